@@ -23,7 +23,8 @@ CONFIG = yaml.safe_load(open("config.yml"))
 
 
 # 1) Load data
-bars = load_minute_bars("data/minute_bars.parquet")
+bars = load_minute_bars("data/minute_bars.parquet",
+                        columns=["symbol", "datetime", "open", "close", "volume"])
 bars = preprocess(bars, CONFIG["universe"]["min_price"]) # sorts, filters
 
 
@@ -1,22 +1,12 @@
 from __future__ import annotations
-import os, math, time
+import os
 import pandas as pd
-from datetime import datetime, timedelta, timezone
 
 from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import GetAssetsRequest
-from alpaca.data.historical import StockHistoricalDataClient
-from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
 
-NY = "America/New_York"
-
-def get_keys():
-    key = os.getenv("APCA_API_KEY_ID")
-    sec = os.getenv("APCA_API_SECRET_KEY")
-    if not key or not sec:
-        raise RuntimeError("Set APCA_API_KEY_ID and APCA_API_SECRET_KEY")
-    return key, sec
+from src.vendors.alpaca_loader import NY, fetch_bars_chunked, get_keys
 
 def active_us_equities():
     key, sec = get_keys()
@@ -26,53 +16,20 @@ def active_us_equities():
     return sorted([a.symbol for a in assets if a.tradable and a.symbol.isalpha()])
 
 def median_dollar_volume(symbols, start, end, feed="iex"):
-    key, sec = get_keys()
-    dc = StockHistoricalDataClient(key, sec)
-    tf = TimeFrame.Day
     out = []
-    # chunk symbols so requests are reasonable
-    CHUNK = 200
-    for i in range(0, len(symbols), CHUNK):
-        chunk = symbols[i:i+CHUNK]
-        req = StockBarsRequest(
-            symbol_or_symbols=chunk,
-            timeframe=tf,
-            start=pd.Timestamp(start, tz=NY).tz_convert("UTC").to_pydatetime(),
-            end=pd.Timestamp(end, tz=NY).tz_convert("UTC").to_pydatetime(),
-            feed=feed,
-            adjustment="split",
-        )
-        bars = dc.get_stock_bars(req).df
-        if bars is None or bars.empty:
-            continue
+    for bars in fetch_bars_chunked(symbols, start, end, TimeFrame.Day, feed):
         df = bars.reset_index()
         df["dv"] = df["close"] * df["volume"]
         med = df.groupby("symbol")["dv"].median().rename("med_dv")
         out.append(med)
-        time.sleep(0.2)  # be nice to the API
     if not out:
         return pd.Series(dtype=float)
     return pd.concat(out).groupby(level=0).max()  # max across chunks to be safe
 
 def fetch_minutes(symbols, start, end, mins=5, feed="iex"):
-    key, sec = get_keys()
-    dc = StockHistoricalDataClient(key, sec)
     tf = TimeFrame(mins, TimeFrameUnit.Minute)
     parts = []
-    CHUNK = 200
-    for i in range(0, len(symbols), CHUNK):
-        chunk = symbols[i:i+CHUNK]
-        req = StockBarsRequest(
-            symbol_or_symbols=chunk,
-            timeframe=tf,
-            start=pd.Timestamp(start, tz=NY).tz_convert("UTC").to_pydatetime(),
-            end=pd.Timestamp(end, tz=NY).tz_convert("UTC").to_pydatetime(),
-            feed=feed,
-            adjustment="split",
-        )
-        bars = dc.get_stock_bars(req).df
-        if bars is None or bars.empty: 
-            continue
+    for bars in fetch_bars_chunked(symbols, start, end, tf, feed):
         df = bars.reset_index()[["symbol","timestamp","open","high","low","close","volume"]]
         df = df.rename(columns={"timestamp":"datetime"})
         df["datetime"] = pd.to_datetime(df["datetime"], utc=True)
@@ -81,7 +38,6 @@ def fetch_minutes(symbols, start, end, mins=5, feed="iex"):
         mask = (dt_local.dt.time >= pd.Timestamp("09:30").time()) & (dt_local.dt.time <= pd.Timestamp("16:00").time())
         df = df[mask]
         parts.append(df.sort_values(["symbol","datetime"]))
-        time.sleep(0.2)
     if not parts:
         return pd.DataFrame(columns=["symbol","datetime","open","high","low","close","volume"])
     return pd.concat(parts, ignore_index=True)
@@ -1,40 +1,65 @@
 import pandas as pd, numpy as np, yaml
+from scipy.stats import rankdata
 from src.features import zscore_vwap_dev
 from src.backtest import to_wide
+from src.utils import local_ns, sort_bars, NS_PER_DAY, NS_PER_MIN
 
 cfg = yaml.safe_load(open("config.yml"))
-bars = pd.read_parquet("data/minute_bars.parquet").sort_values(["symbol","datetime"])
+bars = sort_bars(pd.read_parquet("data/minute_bars.parquet",
+                                 columns=["symbol","datetime","open","close","volume"]))
 
 lb = cfg["signal"]["vol_lookback_min"] // cfg["bar_minutes"]
 feat = zscore_vwap_dev(bars, lb)  # uses VWAP(t-1) per our last patch
 
-Z   = to_wide(feat, "z")
-DEV = to_wide(feat, "close") - to_wide(feat, "vwap")
-O   = to_wide(feat, "open")
-C   = to_wide(feat, "close")
+Z, C, VW, O = to_wide(feat, ["z", "close", "vwap", "open"])
+DEV = C - VW
 
 # time-of-day mask (quiet middle of day)
-idxL = Z.index.tz_convert("America/New_York")
-mins_from_open = ((idxL - idxL.normalize()) - pd.Timedelta(hours=9, minutes=30)).total_seconds()/60
-mins_to_close  = (pd.Timedelta(hours=16) - (idxL - idxL.normalize())).total_seconds()/60
+mod = (local_ns(Z.index) % NS_PER_DAY) / NS_PER_MIN
+mins_from_open = mod - (9 * 60 + 30)
+mins_to_close  = 16 * 60 - mod
 mask = (mins_from_open >= cfg["filters"]["skip_first_min"]) & (mins_to_close >= cfg["filters"]["skip_last_min"])
 
 def qls(sig, q=0.2):
-    r = sig.rank(axis=1, method="first", pct=True)
+    # ordinal ranks == pandas method="first"; pct over the non-NaN names per row
+    r = rankdata(sig, axis=1, method="ordinal", nan_policy="omit")
+    r = r / (~np.isnan(sig)).sum(axis=1, keepdims=True)
     long  = (r <= q).astype(float)
     short = (r >= 1-q).astype(float) * -1.0
     return long + short
 
-for H in [1, 3, 6, 9, 12]:
-    # Trade at t+1 open, hold H bars, exit at t+H close (forward H-bar return)
-    R = (C.shift(-H) / O.shift(-1) - 1.0)
+def row_ic(X, Y):
+    """Row-wise Pearson IC over pairwise-complete names; X (T,N) broadcasts against Y (..., T, N)."""
+    valid = ~np.isnan(X) & ~np.isnan(Y)
+    n  = valid.sum(axis=-1, keepdims=True)
+    Xv = np.where(valid, X, 0.0)
+    Yv = np.where(valid, Y, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        Xc = np.where(valid, Xv - Xv.sum(axis=-1, keepdims=True) / n, 0.0)
+        Yc = np.where(valid, Yv - Yv.sum(axis=-1, keepdims=True) / n, 0.0)
+        ic = (Xc * Yc).sum(axis=-1) / np.sqrt((Xc**2).sum(axis=-1) * (Yc**2).sum(axis=-1))
+    ic[n[..., 0] < 2] = np.nan
+    return np.nanmean(ic, axis=-1)
 
-    Zm, Dm, Rm = Z.loc[mask], DEV.loc[mask], R.loc[mask]
+HS = [1, 3, 6, 9, 12]
 
-    ic_z   = Zm.mul(-1).corrwith(Rm, axis=1).mean()   # -Z for mean reversion
-    ic_dev = Dm.mul(-1).corrwith(Rm, axis=1).mean()   # -(close - vwap)
+# Trade at t+1 open, hold H bars, exit at t+H close (forward H-bar return)
+C_np, O_np = C.to_numpy(), O.to_numpy()
+T = C_np.shape[0]
+R = np.full((len(HS),) + C_np.shape, np.nan)
+for h, H in enumerate(HS):
+    R[h, :T-H] = C_np[H:] / O_np[1:T-H+1] - 1.0
 
-    w = qls(Zm, q=0.2)
-    ls = (w * Rm).sum(axis=1).mean()
+m  = mask
+Rm = R[:, m]
+Zm = Z.to_numpy()[m]
+Dm = DEV.to_numpy()[m]
 
-    print(f"H={H:2d}:  IC_z={ic_z:.5g}  IC_dev={ic_dev:.5g}  mean L-S ret={ls:.5g}")
+ic_z   = row_ic(-Zm, Rm)   # -Z for mean reversion
+ic_dev = row_ic(-Dm, Rm)   # -(close - vwap)
+
+w  = qls(Zm, q=0.2)
+ls = np.nansum(w * Rm, axis=2).mean(axis=1)
+
+for h, H in enumerate(HS):
+    print(f"H={H:2d}:  IC_z={ic_z[h]:.5g}  IC_dev={ic_dev[h]:.5g}  mean L-S ret={ls[h]:.5g}")
@@ -16,9 +16,12 @@ Notes
 
 from __future__ import annotations
 import argparse, yaml
+import numpy as np
 import pandas as pd
-from src.backtest import vector_backtest
+from joblib import Parallel, delayed
+from src.backtest import vector_backtest, signal_ranks, to_wide
 from src.metrics import summary
+from src.utils import local_ns, NS_PER_DAY
 
 NY = "America/New_York"
 
@@ -33,6 +36,10 @@ def day_index(x) -> pd.DatetimeIndex:
     idx = _as_dtindex(x).tz_convert(NY)
     return pd.DatetimeIndex(idx.normalize().unique()).sort_values()
 
+def day_ids(x) -> np.ndarray:
+    """Return the NY trading-day number (int64) of each timestamp."""
+    return local_ns(_as_dtindex(x), NY) // NS_PER_DAY
+
 def windows(x, train_days=20, test_days=5, step_days=5, embargo_days=1):
     """
     Rolling day-based windows with an embargo between train and test.
@@ -52,27 +59,51 @@ def windows(x, train_days=20, test_days=5, step_days=5, embargo_days=1):
         yield tr0, tr1, te0, te1
         i += step_days
 
-def run_slice(df: pd.DataFrame, start_day: pd.Timestamp, end_day: pd.Timestamp, run_kwargs):
+def run_slice(df: pd.DataFrame, start_day: pd.Timestamp, end_day: pd.Timestamp, run_kwargs,
+              days: np.ndarray | None = None):
     """
     Run one backtest slice over [start_day, end_day] (inclusive, NY days).
 
+    Pass `days=day_ids(df["datetime"])` to reuse the day numbers across
+    slices; on datetime-sorted bars each slice is then a searchsorted.
+
     Returns
     -------
     dict | None
         Summary metrics (see src.metrics.summary) or None if slice empty.
     """
 
-    idxL = _as_dtindex(df["datetime"]).tz_convert(NY)
-    mask = (idxL >= start_day) & (idxL < end_day + pd.Timedelta(days=1))
-    sl = df.loc[mask]
+    sl, _ = slice_days(df, start_day, end_day, days)
     if sl.empty:
         return None
     bt = vector_backtest(sl, **run_kwargs)
     return summary(bt)
-def grid_search_on_train(df, tr0, tr1, base_kwargs):
+
+def slice_days(df: pd.DataFrame, start_day: pd.Timestamp, end_day: pd.Timestamp,
+               days: np.ndarray | None = None):
+    """
+    Return (rows, day numbers) of `df` within [start_day, end_day].
+
+    Datetime-sorted bars are cut with a searchsorted; any other order (e.g.
+    the usual ['symbol','datetime']) falls back to a boolean day mask.
+    """
+    if days is None:
+        days = day_ids(df["datetime"])
+    d0, d1 = day_ids([start_day, end_day])
+    if (np.diff(days) >= 0).all():
+        i0, i1 = np.searchsorted(days, [d0, d1 + 1])
+        return df.iloc[i0:i1], days[i0:i1]
+    keep = (days >= d0) & (days <= d1)
+    return df[keep], days[keep]
+
+def grid_search_on_train(df, tr0, tr1, base_kwargs, days=None, n_jobs=-1):
     """
     Brute-force a tiny grid on TRAIN to pick a reasonable configuration.
 
+    The TRAIN slice is cut once, signal ranks are computed once per K, and
+    the grid points are run in parallel with joblib (`n_jobs` workers;
+    1 runs serially in-process).
+
     Objective
     ---------
     Maximize annualized net Sharpe on TRAIN.
@@ -90,11 +121,19 @@ def grid_search_on_train(df, tr0, tr1, base_kwargs):
         for (qi, qo) in ((0.30, 0.55), (0.35, 0.60))
         for K in (6, 9)
     ]
+    sl, sl_days = slice_days(df, tr0, tr1, days)
+    if sl.empty:
+        return None
+    prices = to_wide(sl, "close")
+    mode = base_kwargs.get("signal_mode", "momentum")
+    ranks = {K: signal_ranks(prices, K, mode) for K in {g["K"] for g in grid}}
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(run_slice)(sl, tr0, tr1, base_kwargs | g | {"ranks": ranks[g["K"]]}, sl_days)
+        for g in grid
+    )
     best = None
-    for g in grid:
-        kw = base_kwargs | g
-        s = run_slice(df, tr0, tr1, kw)
-        if not s: 
+    for g, s in zip(grid, results):
+        if not s:
             continue
         score = s["Ann. Sharpe (net)"]    # objective on TRAIN
         if (best is None) or (score > best[0]):
@@ -124,11 +163,14 @@ if __name__ == "__main__":
     parser.add_argument("--band-bps", dest="band_bps", type=float, default=0.0)
     parser.add_argument("--grid-bps", dest="grid_bps", type=float, default=0.0)
     parser.add_argument("--rebars", dest="rebars", type=int, default=6)
+    parser.add_argument("--n-jobs", dest="n_jobs", type=int, default=-1)
 
     args = parser.parse_args()
 
     cfg  = yaml.safe_load(open("config.yml"))
-    bars = pd.read_parquet(args.data).sort_values(["symbol", "datetime"])
+    bars = pd.read_parquet(args.data, columns=["symbol", "datetime", "open", "close"])
+    bars = bars.sort_values(["datetime", "symbol"], ignore_index=True)
+    days = day_ids(bars["datetime"])
 
     run_kwargs = dict(
         sectors=None,
@@ -152,13 +194,13 @@ if __name__ == "__main__":
     for (tr0, tr1, te0, te1) in windows(
         bars["datetime"], args.train_days, args.test_days, args.step_days, args.embargo_days
     ):
-        choice = grid_search_on_train(bars, tr0, tr1, run_kwargs)
+        choice = grid_search_on_train(bars, tr0, tr1, run_kwargs, days, n_jobs=args.n_jobs)
         if not choice:
             continue
 
         # 2) Evaluate once on TRAIN (to log) and once on TEST (true OOS)
-        s_tr = run_slice(bars, tr0, tr1, run_kwargs | choice)
-        s_te = run_slice(bars, te0, te1, run_kwargs | choice)
+        s_tr = run_slice(bars, tr0, tr1, run_kwargs | choice, days)
+        s_te = run_slice(bars, te0, te1, run_kwargs | choice, days)
         if s_tr and s_te:
             rows.append({
                 "train": f"{tr0.date()}→{tr1.date()}",
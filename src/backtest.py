@@ -12,8 +12,16 @@ Design
 from __future__ import annotations
 import pandas as pd
 import numpy as np
+from numba import njit
 from .portfolio import cross_sectional_z, neutralize, size_positions
-from .costs import costs_from_turnover
+from .costs import bar_turnover
+from .utils import local_ns, NS_PER_DAY, NS_PER_MIN
+
+# Stateful (T, N) kernels below are compiled lazily, so numba builds a
+# dedicated version per dtype/layout actually passed (C-contiguous float32
+# on the execution path, float64 from the public helpers). Explicit
+# signatures would reject the read-only arrays pandas hands out under
+# copy-on-write. nogil lets thread-based callers run them concurrently.
 
 def rate_limit_time(w_target: pd.DataFrame, step_bps: float, max_w: float) -> pd.DataFrame:
     """"
@@ -34,67 +42,135 @@ def rate_limit_time(w_target: pd.DataFrame, step_bps: float, max_w: float) -> pd
         Executed weights after rate limiting.
     """
     step = step_bps / 1e4
-    cols = w_target.columns
-    prev = pd.Series(0.0, index=cols)
-    rows = []
-    for _, row in w_target.iterrows():
-        delta = (row - prev).clip(-step, step)
-        prev = (prev + delta).clip(-max_w, max_w)
-        rows.append(prev.values)
-    return pd.DataFrame(rows, index=w_target.index, columns=cols)
-
-def sticky_membership(score: pd.DataFrame,
+    target = np.ascontiguousarray(w_target.to_numpy(dtype=np.float64))
+    out = np.empty_like(target)
+    _rate_limit_kernel(target, step, max_w, out)
+    return pd.DataFrame(out, index=w_target.index, columns=w_target.columns)
+
+@njit(cache=True, nogil=True)
+def _rate_limit_kernel(target, step, max_w, out):
+    """Sequential clamp of (T, N) targets; carries the executed row in `prev`."""
+    T, N = target.shape
+    prev = np.zeros(N, dtype=target.dtype)
+    for t in range(T):
+        for j in range(N):
+            d = target[t, j] - prev[j]
+            if d > step:
+                d = step
+            elif d < -step:
+                d = -step
+            p = prev[j] + d
+            if p > max_w:
+                p = max_w
+            elif p < -max_w:
+                p = -max_w
+            prev[j] = p
+            out[t, j] = p
+
+def signal_ranks(prices: pd.DataFrame, K: int, signal_mode: str = "momentum") -> pd.DataFrame:
+    """
+    Cross-sectional percentile ranks of the K-bar log-return signal.
+
+    Ranks depend only on (prices, K, signal_mode), so callers sweeping
+    execution/hysteresis knobs can compute them once and pass them to
+    `vector_backtest(..., ranks=...)`.
+
+    Parameters
+    ----------
+    prices : DataFrame
+        Wide close prices (index=time, columns=symbol).
+    K : int
+        Horizon in bars for the return used in the signal.
+    signal_mode : {'momentum','meanrev'}
+        Orientation of the cross-sectional K-bar return.
+
+    Returns
+    -------
+    DataFrame
+        Row-wise ranks in (0, 1], method="first".
+    """
+    retk = np.log(prices).diff(K)
+    score = -retk if signal_mode.lower() == "momentum" else retk
+    return pd.DataFrame(_pct_rank_ordinal(score.to_numpy(dtype=np.float64)),
+                        index=score.index, columns=score.columns)
+
+def _pct_rank_ordinal(a: np.ndarray) -> np.ndarray:
+    """
+    Row-wise ``rank(axis=1, method="first", pct=True)`` on a 2-D array.
+
+    A stable argsort breaks ties by position and sorts NaNs last; NaNs stay
+    NaN and the percentage is taken over the non-NaN count of each row.
+    """
+    T, N = a.shape
+    order = np.argsort(a, axis=1, kind="stable")
+    ranks = np.empty((T, N))
+    ranks[np.arange(T)[:, None], order] = np.arange(1, N + 1)
+    nan = np.isnan(a)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ranks /= (N - nan.sum(axis=1))[:, None]
+    ranks[nan] = np.nan
+    return ranks
+
+def sticky_membership(score: pd.DataFrame | None,
                       q_in: float = 0.25, q_out: float = 0.35,
-                      update_mask: pd.Series | None = None) -> pd.DataFrame:
+                      update_mask: pd.Series | None = None,
+                      ranks: pd.DataFrame | None = None) -> pd.DataFrame:
     
     """
     Build sticky {-1,0,+1} membership with hysteresis.
 
     Parameters
     ----------
-    score : DataFrame
+    score : DataFrame or None
         Cross-sectional signal (index=time, columns=symbol).
-        Lower ranks are interpreted as "more long".
+        Lower ranks are interpreted as "more long". Ignored if `ranks` is given.
     q_in, q_out : float
         Enter and exit quantiles in [0,1]; require q_out >= q_in.
     update_mask : Series, optional
         Times when membership may update (True). If None, updates each bar.
+    ranks : DataFrame, optional
+        Precomputed `score.rank(axis=1, method="first", pct=True)`.
 
     Returns
     -------
     DataFrame
-        Membership in {-1, 0, +1}, forward-filled between allowed updates.
+        Membership in {-1, 0, +1}, carried forward between allowed updates.
     """
 
     assert q_out >= q_in, "q_out must be >= q_in"
-    ranks = score.rank(axis=1, method="first", pct=True)
-    m = pd.DataFrame(0.0, index=score.index, columns=score.columns)
+    if ranks is None:
+        ranks = pd.DataFrame(_pct_rank_ordinal(score.to_numpy(dtype=np.float64)),
+                             index=score.index, columns=score.columns)
+    r = np.ascontiguousarray(ranks.to_numpy(dtype=np.float64))
 
     if update_mask is None:
-        update_mask = pd.Series(True, index=score.index)
-    update_times = update_mask[update_mask].index
-
-    prev = m.iloc[0].copy()
-    for t in update_times:
-        r = ranks.loc[t]
-
-        was_long  = (prev ==  1.0)
-        was_short = (prev == -1.0)
-
-        stay_long  = was_long  & (r >= 1 - q_out)   # stay long while rank stays HIGH
-        stay_short = was_short & (r <= q_out)       # stay short while rank stays LOW
-        enter_long  = (~was_long)  & (r >= 1 - q_in)
-        enter_short = (~was_short) & (r <= q_in)
-
-        cur = pd.Series(0.0, index=score.columns)
-        cur[stay_long | enter_long]   =  1.0
-        cur[stay_short | enter_short] = -1.0
-
-        m.loc[t] = cur.values
-        prev = cur
-
-    m = m.replace(0.0, np.nan).ffill().fillna(0.0)
-    return m
+        upd = np.ones(len(ranks.index), dtype=np.bool_)
+    else:
+        upd = update_mask.reindex(ranks.index, fill_value=False).to_numpy(dtype=np.bool_)
+
+    out = np.empty_like(r)
+    _sticky_kernel(r, upd, q_in, q_out, out)
+    return pd.DataFrame(out, index=ranks.index, columns=ranks.columns)
+
+@njit(cache=True, nogil=True)
+def _sticky_kernel(ranks, update_mask, q_in, q_out, out):
+    """Hysteresis state machine over (T, N) ranks; `prev` carries between updates."""
+    T, N = ranks.shape
+    prev = np.zeros(N)
+    for t in range(T):
+        if update_mask[t]:
+            for j in range(N):
+                r = ranks[t, j]
+                was_long  = prev[j] ==  1.0
+                was_short = prev[j] == -1.0
+                # short wins ties, matching the original assignment order
+                if (was_short and r <= q_out) or ((not was_short) and r <= q_in):
+                    prev[j] = -1.0
+                elif (was_long and r >= 1 - q_out) or ((not was_long) and r >= 1 - q_in):
+                    prev[j] = 1.0
+                else:
+                    prev[j] = 0.0
+        out[t] = prev
 
 def quantile_long_short(zwide: pd.DataFrame, q: float = 0.1) -> pd.DataFrame:
     """
@@ -115,33 +191,65 @@ def quantile_long_short(zwide: pd.DataFrame, q: float = 0.1) -> pd.DataFrame:
         - -1 for short positions (top quantile).
         - 0 otherwise.
     """
-    ranks = zwide.rank(axis=1, method="first", pct=True)
+    ranks = pd.DataFrame(_pct_rank_ordinal(zwide.to_numpy(dtype=np.float64)),
+                         index=zwide.index, columns=zwide.columns)
     long  = (ranks <= q).astype(float)
     short = (ranks >= 1 - q).astype(float) * -1.0
     return long + short
 
-def to_wide(df: pd.DataFrame, col: str) -> pd.DataFrame:
+def to_wide(df: pd.DataFrame, col: str | list[str]) -> pd.DataFrame | list[pd.DataFrame]:
     """
     Convert a long-format DataFrame into wide format by pivoting on symbol.
 
+    The (datetime, symbol) grid is factorized once and values are scattered
+    straight into a (T, N) array; passing several columns reuses the grid
+    and returns frames that share the same index/columns objects. Rows with
+    a missing datetime or symbol are dropped.
+
     Parameters
     ----------
     df : pd.DataFrame
         Input DataFrame with columns ['datetime', 'symbol', col].
-    col : str
-        Column to pivot into wide format (e.g., 'close', 'volume').
+    col : str or list of str
+        Column(s) to pivot into wide format (e.g., 'close', 'volume').
 
     Returns
     -------
-    pd.DataFrame
-        Wide-format DataFrame with:
+    pd.DataFrame or list of pd.DataFrame
+        Wide-format DataFrame (one per column if a list is given) with:
         - Index = datetime
         - Columns = symbols
         - Values = col
     """
-    return df.pivot(index="datetime", columns="symbol", values=col).sort_index()
-
-def apply_no_trade_band(w_smooth: pd.DataFrame, band_bps: float = 10.0) -> pd.DataFrame:
+    t_codes, index = pd.factorize(df["datetime"], sort=True)
+    s_codes, columns = pd.factorize(df["symbol"], sort=True)
+    index = pd.Index(index, name="datetime")
+    if isinstance(columns, pd.CategoricalIndex):
+        columns = columns.astype(columns.categories.dtype)
+    columns = pd.Index(columns, name="symbol")
+    T, N = len(index), len(columns)
+
+    # rows with a missing datetime/symbol (code -1) have no cell; drop them
+    keep = (t_codes >= 0) & (s_codes >= 0)
+    flat = t_codes[keep].astype(np.int64) * N + s_codes[keep]
+    counts = np.bincount(flat, minlength=T * N)
+    if counts.max(initial=0) > 1:
+        raise ValueError("Index contains duplicate entries, cannot reshape")
+    dense = bool(counts.all())
+
+    frames = []
+    for c in ([col] if isinstance(col, str) else col):
+        vals = df[c].to_numpy()[keep]
+        if dense:
+            arr = np.empty(T * N, dtype=vals.dtype)
+        else:
+            arr = np.full(T * N, np.nan)
+        arr[flat] = vals
+        frames.append(pd.DataFrame(arr.reshape(T, N), index=index, columns=columns))
+    return frames[0] if isinstance(col, str) else frames
+
+def apply_no_trade_band(w_smooth: pd.DataFrame, band_bps: float = 10.0,
+                        dtype=np.float64) -> pd.DataFrame:
     
     """
     Apply a symmetric no-trade band around the last executed weight.
@@ -154,6 +262,8 @@ def apply_no_trade_band(w_smooth: pd.DataFrame, band_bps: float = 10.0) -> pd.Da
         Target weights per time/name.
     band_bps : float
         Band half-width in basis points.
+    dtype : numpy dtype, default float64
+        Dtype the band state is carried in (and of the result).
 
     Returns
     -------
@@ -161,16 +271,84 @@ def apply_no_trade_band(w_smooth: pd.DataFrame, band_bps: float = 10.0) -> pd.Da
         Executed weights after band.
     """
 
-    band = band_bps / 1e4
-    cols = w_smooth.columns
-    prev = pd.Series(0.0, index=cols)
-    rows = []
-    for _, row in w_smooth.iterrows():
-        delta = row - prev
-        trade = delta.abs() >= band
-        prev = prev.where(~trade, row)   # only move when outside the band
-        rows.append(prev.values)
-    return pd.DataFrame(rows, index=w_smooth.index, columns=cols)
+    f = np.dtype(dtype).type
+    target = np.ascontiguousarray(w_smooth.to_numpy(dtype=dtype))
+    out = np.empty_like(target)
+    _band_kernel(target, f(band_bps / 1e4), out)
+    return pd.DataFrame(out, index=w_smooth.index, columns=w_smooth.columns)
+
+@njit(cache=True, nogil=True)
+def _band_kernel(target, band, out):
+    """Move each name to target only when it leaves the band around `prev`."""
+    T, N = target.shape
+    prev = np.zeros(N, dtype=target.dtype)
+    for t in range(T):
+        for j in range(N):
+            d = target[t, j] - prev[j]
+            if d >= band or d <= -band:
+                prev[j] = target[t, j]
+            out[t, j] = prev[j]
+
+def band_rate_limit(w_target: pd.DataFrame, band_bps: float | None, step_bps: float, max_w: float,
+                    dtype=np.float64) -> pd.DataFrame:
+    """
+    No-trade band followed by the time rate limit, in a single pass.
+
+    Equivalent to ``rate_limit_time(apply_no_trade_band(w_target, band_bps), ...)``
+    without materializing the banded intermediate. A non-positive (or None)
+    band disables the band stage.
+
+    Parameters
+    ----------
+    w_target : DataFrame
+        Target weights per time/name.
+    band_bps : float
+        Band half-width in basis points.
+    step_bps : float
+        Maximum absolute weight delta per update, in basis points.
+    max_w : float
+        Per-name absolute weight cap (fraction of NAV).
+    dtype : numpy dtype, default float64
+        Dtype the execution state is carried in (and of the result).
+
+    Returns
+    -------
+    DataFrame
+        Executed weights after band and rate limiting.
+    """
+
+    f = np.dtype(dtype).type
+    target = np.ascontiguousarray(w_target.to_numpy(dtype=dtype))
+    out = np.empty_like(target)
+    _band_rate_limit_kernel(target, f(max(band_bps or 0.0, 0.0) / 1e4), f(step_bps / 1e4), f(max_w), out)
+    return pd.DataFrame(out, index=w_target.index, columns=w_target.columns)
+
+@njit(cache=True, nogil=True)
+def _band_rate_limit_kernel(target, band, step, max_w, out):
+    """Fused band + clamp; `banded` is the band state, `prev` the executed weight."""
+    T, N = target.shape
+    banded = np.zeros(N, dtype=target.dtype)
+    prev = np.zeros(N, dtype=target.dtype)
+    for t in range(T):
+        for j in range(N):
+            x = target[t, j]
+            if band > 0.0:
+                b = x - banded[j]
+                if b >= band or b <= -band:
+                    banded[j] = x
+                x = banded[j]
+            d = x - prev[j]
+            if d > step:
+                d = step
+            elif d < -step:
+                d = -step
+            p = prev[j] + d
+            if p > max_w:
+                p = max_w
+            elif p < -max_w:
+                p = -max_w
+            prev[j] = p
+            out[t, j] = p
 
 def vector_backtest(
     df_feat: pd.DataFrame,
@@ -191,6 +369,7 @@ def vector_backtest(
     q_in: float = 0.30,
     q_out: float = 0.55,
     debug: bool = False,
+    ranks: pd.DataFrame | None = None,
 ) -> pd.DataFrame:
 
     """
@@ -230,6 +409,9 @@ def vector_backtest(
         If True, compute open→open returns and rebalance at opens.
     debug : bool
         If True, prints small diagnostics; default False.
+    ranks : DataFrame, optional
+        Precomputed `signal_ranks(to_wide(df_feat, "close"), K, signal_mode)`;
+        lets a parameter sweep reuse the ranking across execution knobs.
 
     Returns
     -------
@@ -237,48 +419,49 @@ def vector_backtest(
         Columns: ['raw_ret','tc','net_ret','turnover'] indexed by timestamp.
     """
 
-    prices = to_wide(df_feat, "close")
-    opens  = to_wide(df_feat, "open")
+    prices, opens = to_wide(df_feat, ["close", "open"])
 
-    idx_local = prices.index.tz_convert("America/New_York")
-    minutes_from_open = ((idx_local - idx_local.normalize()) - pd.Timedelta(hours=9, minutes=30)).total_seconds()/60
-    minutes_to_close  = (pd.Timedelta(hours=16) - (idx_local - idx_local.normalize())).total_seconds()/60
-    mask = pd.Series((minutes_from_open >= skip_first_min) & (minutes_to_close >= skip_last_min),
-                 index=prices.index)
+    ns_local = local_ns(prices.index)
+    minute_of_day = (ns_local % NS_PER_DAY) / NS_PER_MIN
+    minutes_from_open = minute_of_day - (9 * 60 + 30)
+    minutes_to_close  = 16 * 60 - minute_of_day
+    mask = (minutes_from_open >= skip_first_min) & (minutes_to_close >= skip_last_min)
 
-    by_day  = pd.Series(idx_local.date, index=prices.index)
-    bar_num = by_day.groupby(by_day).cumcount()
+    day = ns_local // NS_PER_DAY
+    pos = np.arange(len(day))
+    day_start = np.r_[True, day[1:] != day[:-1]]
+    bar_num = pos - np.maximum.accumulate(np.where(day_start, pos, 0))
     update_mask = pd.Series((bar_num % rebalance_every_n_bars) == 0, index=prices.index)
 
     assert update_mask.index.equals(prices.index)
     assert isinstance(update_mask, pd.Series)
 
 
-    logpx = np.log(prices)
-    retk = np.log(prices).diff(K)
-
-    if signal_mode.lower() == "momentum":
-        score = -retk
-
-    else:  
-        score = retk
+    if ranks is None:
+        ranks = signal_ranks(prices, K, signal_mode)
 
-    memb = sticky_membership(score, q_in=q_in, q_out=q_out, update_mask=update_mask)
+    memb = sticky_membership(None, q_in=q_in, q_out=q_out, update_mask=update_mask, ranks=ranks)
     memb = memb.loc[mask]
 
-    w_target = memb.fillna(0.0).div(memb.abs().sum(axis=1), axis=0) * gross
-    update_mask2 = update_mask.reindex(w_target.index, fill_value=False)
-    w_target = w_target.where(update_mask2, np.nan).ffill().fillna(0.0)
-    w_target = w_target.clip(-max_w, max_w)
+    m = memb.to_numpy()
+    g = np.abs(m).sum(axis=1, keepdims=True)
+    w = np.divide(m, g, out=np.zeros_like(m), where=g > 0) * gross
 
-    exec_mode = exec_mode.lower()
+    # hold each in-session update row until the next one (gather, no ffill)
+    upd = update_mask.to_numpy()[mask]
+    last = np.maximum.accumulate(np.where(upd, np.arange(len(upd)), -1))
+    w = np.where((last >= 0)[:, None], w[np.maximum(last, 0)], 0.0)
+    w_target = pd.DataFrame(np.clip(w, -max_w, max_w), index=memb.index, columns=memb.columns)
 
-    if exec_mode == "ratelimit":
-        w_pre  = apply_no_trade_band(w_target, band_bps) if band_bps and band_bps > 0 else w_target
-        w_exec = rate_limit_time(w_pre, step_bps=step_bps, max_w=max_w)
+    exec_mode = exec_mode.lower()
 
-    elif exec_mode == "band":
-        w_exec = apply_no_trade_band(w_target, band_bps=band_bps)
+    if exec_mode in ("ratelimit", "band"):
+        # execution state is carried as contiguous float32; upcast once for P&L
+        if exec_mode == "ratelimit":
+            w_exec = band_rate_limit(w_target, band_bps, step_bps, max_w, dtype=np.float32)
+        else:
+            w_exec = apply_no_trade_band(w_target, band_bps, dtype=np.float32)
+        w_exec = w_exec.astype(np.float64)
 
     elif exec_mode == "grid":
         g = max(1e-8, grid_bps / 1e4)
@@ -294,8 +477,8 @@ def vector_backtest(
     w_lag     = w_exec.shift(1).fillna(0.0)
     pnl_gross = (w_lag * rets_oc).sum(axis=1).rename("raw_ret")
 
-    tc       = costs_from_turnover(w_exec, cost_bps=cost_bps)
-    turnover = w_exec.diff().abs().sum(axis=1).rename("turnover")
+    turnover = bar_turnover(w_exec)
+    tc       = (turnover * cost_bps / 1e4).rename("tc")
 
     if debug:
         diag_rets = (prices / opens - 1.0).reindex(w_exec.index)
@@ -308,6 +491,9 @@ def vector_backtest(
                 .sum(axis=1).mean()))
         
 
-    pnl_net = (pnl_gross - tc).rename("net_ret")
-    out = pd.concat({"raw_ret": pnl_gross, "tc": tc, "net_ret": pnl_net, "turnover": turnover}, axis=1)
-    return out.dropna()
+    raw = pnl_gross.to_numpy()
+    cost = tc.to_numpy()
+    cols = np.column_stack([raw, cost, raw - cost, turnover.to_numpy()])
+    valid = ~np.isnan(cols).any(axis=1)
+    out = pd.DataFrame(cols, index=pnl_gross.index, columns=["raw_ret", "tc", "net_ret", "turnover"])
+    return out if valid.all() else out.loc[valid]
@@ -0,0 +1,74 @@
+"""
+Columnar (struct-of-arrays) view of long-form minute bars for the compute path.
+
+Feature kernels only need a handful of contiguous columns; carrying them as
+plain ndarrays skips the block-manager indirection. Prices and volume stay
+float64 and are taken from the frame without a copy when it already holds
+float64, so the struct costs no extra memory. DataFrames stay at the
+IO/report boundaries.
+"""
+
+from __future__ import annotations
+from typing import NamedTuple
+import pandas as pd
+import numpy as np
+from .utils import as_codes, NS_PER_DAY
+
+
+class Bars(NamedTuple):
+    """
+    Bars sorted by (symbol, datetime), one entry per row.
+
+    Attributes
+    ----------
+    day : np.ndarray[int64]
+        Wall-clock day number in the source column's own tz.
+    close, volume : np.ndarray[float64]
+        Bar close and volume.
+    seg_starts : np.ndarray[int64]
+        Row offsets of each symbol's segment plus a trailing `len(bars)`,
+        so segment k spans `seg_starts[k]:seg_starts[k + 1]`.
+    """
+
+    day: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    seg_starts: np.ndarray
+
+
+def wall_day(datetime: pd.Series | pd.DatetimeIndex) -> np.ndarray:
+    """Day number of each timestamp in the wall-clock time of its own tz."""
+    dt = pd.DatetimeIndex(datetime)
+    if dt.tz is not None:
+        dt = dt.tz_localize(None)
+    return dt.as_unit("ns").asi8 // NS_PER_DAY
+
+
+def segment_offsets(sym: np.ndarray) -> np.ndarray:
+    """Start row of each run of equal codes, plus a trailing `len(sym)`."""
+    brk = np.ones(len(sym), dtype=bool)
+    brk[1:] = sym[1:] != sym[:-1]
+    return np.append(np.flatnonzero(brk), len(sym))
+
+
+def to_bars(df: pd.DataFrame) -> Bars:
+    """
+    Convert long-form bars to a `Bars` struct of contiguous arrays.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Long-form bars with ['datetime', 'symbol', 'close', 'volume'],
+        sorted by ['symbol', 'datetime'].
+
+    Returns
+    -------
+    Bars
+        Row-aligned arrays; row i corresponds to `df.iloc[i]`.
+    """
+    return Bars(
+        day=wall_day(df["datetime"]),
+        close=np.ascontiguousarray(df["close"].to_numpy(dtype=np.float64)),
+        volume=np.ascontiguousarray(df["volume"].to_numpy(dtype=np.float64)),
+        seg_starts=segment_offsets(as_codes(df)),
+    )
@@ -6,6 +6,28 @@ tc_t = cost_bps * sum_i |w_{t,i} - w_{t-1,i}| / 1e4
 """
 from __future__ import annotations
 import pandas as pd
+import numpy as np
+
+
+def bar_turnover(weights: pd.DataFrame) -> pd.Series:
+    """
+    Per-bar turnover ∑|Δw_i| from executed weights (first bar = 0).
+
+    Parameters
+    ----------
+    weights : pd.DataFrame
+        Executed weights (time × symbols).
+
+    Returns
+    -------
+    pd.Series
+        Turnover per bar (same index as `weights`), named "turnover".
+    """
+    w = weights.to_numpy(dtype=np.float64)
+    dw = np.zeros(len(w))
+    if len(w) > 1:
+        dw[1:] = np.nansum(np.abs(np.diff(w, axis=0)), axis=1)
+    return pd.Series(dw, index=weights.index, name="turnover")
 
 
 def costs_from_turnover(weights: pd.DataFrame, cost_bps: float) -> pd.Series:
@@ -30,5 +52,4 @@ def costs_from_turnover(weights: pd.DataFrame, cost_bps: float) -> pd.Series:
     - Turnover per bar is ∑|Δw_i| over all symbols.
     - Costs are in **return space** (fraction of NAV), not dollars.
     """
-    dw = weights.diff().abs().sum(axis=1)
-    return (dw * cost_bps / 1e4).rename("tc")
\ No newline at end of file
+    return (bar_turnover(weights) * cost_bps / 1e4).rename("tc")
\ No newline at end of file
@@ -11,12 +11,14 @@ Conventions
 
 from __future__ import annotations
 import pandas as pd
+import numpy as np
+from .utils import sort_bars, NS_PER_DAY
 
 
 COLS = ["symbol","datetime","open","high","low","close","volume"]
 
 
-def load_minute_bars(path: str) -> pd.DataFrame:
+def load_minute_bars(path: str, columns: list[str] = COLS) -> pd.DataFrame:
     """
     Load minute bars from Parquet (preferred) or CSV.
 
@@ -25,19 +27,26 @@ def load_minute_bars(path: str) -> pd.DataFrame:
     path : str
         File path. If it ends with '.parquet', uses pyarrow/Parquet;
         otherwise falls back to CSV.
+    columns : list of str
+        Columns to read (subset of COLS). Pushed down to the reader so
+        unused columns are never decoded.
 
     Returns
     -------
     pd.DataFrame
-        Long-form bars with required columns; `datetime` is tz-aware (UTC).
+        Long-form bars with the requested columns; `datetime` is tz-aware (UTC)
+        and `symbol` is categorical.
     """
 
+    columns = list(columns)
     if path.endswith(".parquet"):
-        df = pd.read_parquet(path)
+        df = pd.read_parquet(path, columns=columns)
     else:
-        df = pd.read_csv(path)
-    df = df[COLS].copy()
+        df = pd.read_csv(path, usecols=columns)
+    df = df.reindex(columns=columns)
     df["datetime"] = pd.to_datetime(df["datetime"], utc=True)
+    if "symbol" in df:
+        df["symbol"] = df["symbol"].astype("category")
     return df
 
 
@@ -58,9 +67,7 @@ def preprocess(df: pd.DataFrame, min_price: float = 5.0) -> pd.DataFrame:
         Filtered and sorted bars (by ['symbol','datetime']).
     """
 
-    df = df[df["close"] >= min_price].copy()
-    df.sort_values(["symbol","datetime"], inplace=True)
-    return df
+    return sort_bars(df[df["close"] >= min_price])
 
 
 def median_dollar_vol(df: pd.DataFrame, lookback_days: int = 30) -> pd.Series:
@@ -88,7 +95,25 @@ def median_dollar_vol(df: pd.DataFrame, lookback_days: int = 30) -> pd.Series:
         Median daily dollar volume by symbol (index = symbol, name 'dollar_vol').
     """
     
-    g = df.assign(dv=df["close"] * df["volume"]).groupby(["symbol", df["datetime"].dt.date])
-    daily_dv = g["dv"].sum().reset_index(name="dollar_vol")
-    med = daily_dv.groupby("symbol")["dollar_vol"].median()
-    return med
\ No newline at end of file
+    sym, names = pd.factorize(df["symbol"], sort=True)
+    if isinstance(names, pd.CategoricalIndex):
+        names = names.astype(names.categories.dtype)
+    dt = pd.DatetimeIndex(df["datetime"])
+    day = dt.as_unit("ns").asi8 // NS_PER_DAY
+    dv = np.nan_to_num(df["close"].to_numpy(dtype=float) * df["volume"].to_numpy(dtype=float))
+
+    # missing symbols/timestamps form no group (as groupby drops NaN keys)
+    keep = (sym >= 0) & ~dt.isna()
+    sym, day, dv = sym[keep], day[keep], dv[keep]
+
+    # sort by (symbol, day) and sum each run of equal keys
+    order = np.lexsort((day, sym))
+    sym, day, dv = sym[order], day[order], dv[order]
+    new_key = np.ones(len(sym), dtype=bool)
+    new_key[1:] = (sym[1:] != sym[:-1]) | (day[1:] != day[:-1])
+    starts = np.flatnonzero(new_key)
+    daily_dv = np.add.reduceat(dv, starts) if len(starts) else dv[:0]
+
+    med = pd.Series(daily_dv, name="dollar_vol").groupby(sym[starts]).median()
+    med.index = pd.Index(names[med.index], name="symbol")
+    return med
@@ -6,9 +6,35 @@ up to and including t-1 unless explicitly stated otherwise.
 """
 
 from __future__ import annotations
+import threading
 import pandas as pd
 import numpy as np
-from .utils import safe_div
+from numba import njit, prange
+from .bars import Bars, to_bars, segment_offsets, wall_day
+from .utils import as_codes, safe_div, sort_bars
+
+# Loaders hand over bars sorted by ['symbol','datetime'] (see
+# `data.preprocess`), so the feature builders trust that order instead of
+# re-sorting; set False to have `zscore_vwap_dev` sort defensively.
+ASSUME_SORTED = True
+
+_scratch = threading.local()
+
+
+def _get_scratch(n: int, dtype=np.float64) -> np.ndarray:
+    """
+    Thread-local grow-only work buffer of length `n`.
+
+    Valid until the next call from the same thread; never return it.
+    """
+    bufs = getattr(_scratch, "bufs", None)
+    if bufs is None:
+        bufs = _scratch.bufs = {}
+    dtype = np.dtype(dtype)
+    buf = bufs.get(dtype)
+    if buf is None or buf.shape[0] < n:
+        buf = bufs[dtype] = np.empty(n, dtype=dtype)
+    return buf[:n]
 
 
 def incremental_vwap(df: pd.DataFrame) -> pd.Series:
@@ -28,17 +54,43 @@ def incremental_vwap(df: pd.DataFrame) -> pd.Series:
         sets VWAP to the current close (early bars are typically skipped anyway).
     """
 
-    px  = df["close"]  
-    vol = df["volume"].astype(float)
+    out = np.empty(len(df))
+    starts, ends = _segments(as_codes(df))
+    _vwap_kernel(df["close"].to_numpy(dtype=np.float64), df["volume"].to_numpy(dtype=np.float64),
+                 wall_day(df["datetime"]), starts, ends, out)
+    return pd.Series(out, index=df.index, name="vwap")
+
+
+def _segments(sym: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """[start, end) row bounds of each run of equal symbol codes."""
+    off = segment_offsets(sym)
+    return off[:-1], off[1:]
+
+
+# Symbols are independent, so each kernel below sweeps its per-symbol
+# segments in parallel (prange); the *_segment helpers hold the sequential
+# per-symbol recurrences.
 
-    g_keys = [df["symbol"], df["datetime"].dt.date]
-    num_cum = (px * vol).groupby(g_keys).cumsum().shift(1)
-    den_cum = vol.groupby(g_keys).cumsum().shift(1)
+@njit(cache=True, nogil=True, parallel=True)
+def _vwap_kernel(close, vol, day, starts, ends, out):
+    for k in prange(starts.shape[0]):
+        _vwap_segment(close, vol, day, starts[k], ends[k], out)
 
-    vwap = (num_cum / den_cum)
-    vwap = vwap.fillna(px)
-    return vwap.rename("vwap")
 
+@njit(cache=True, nogil=True)
+def _vwap_segment(close, vol, day, lo, hi, out):
+    """Single pass over one symbol's bars; num/den reset on each day change."""
+    num = 0.0
+    den = 0.0
+    for i in range(lo, hi):
+        if i == lo or day[i] != day[i - 1]:
+            num = 0.0
+            den = 0.0
+        out[i] = num / den if den != 0.0 else close[i]
+        pv = close[i] * vol[i]
+        if not np.isnan(pv):
+            num += pv
+            den += vol[i]
 
 
 def rolling_vol(df: pd.DataFrame, lookback_bars: int = 6) -> pd.Series:
@@ -59,14 +111,91 @@ def rolling_vol(df: pd.DataFrame, lookback_bars: int = 6) -> pd.Series:
         Rolling standard deviation aligned to df's index (name='sigma').
     """
 
-    ret = np.log(df["close"]).groupby(df["symbol"]).diff()
+    close = df["close"].to_numpy(dtype=np.float64)
+    logp = np.log(close, out=_get_scratch(len(close)), dtype=np.float64)
+    out = np.empty(len(logp))
+    starts, ends = _segments(as_codes(df))
+    _rolling_std_kernel(logp, starts, ends, lookback_bars, max(2, lookback_bars // 2), out)
+    return pd.Series(out, index=df.index, name="sigma")
 
-    vol = ret.groupby(df["symbol"]).apply(
-        lambda s: s.rolling(lookback_bars, min_periods=max(2, lookback_bars // 2)).std()
-    )
-    vol.index = vol.index.droplevel(0)
-    return vol.rename("sigma")
 
+@njit(cache=True, nogil=True, parallel=True)
+def _rolling_std_kernel(logp, starts, ends, L, min_p, out):
+    for k in prange(starts.shape[0]):
+        _rolling_std_segment(logp, starts[k], ends[k], L, min_p, out)
+
+
+@njit(cache=True, nogil=True)
+def _rolling_std_segment(logp, lo, hi, L, min_p, out):
+    """
+    Rolling sample std of one symbol's log returns, one pass with Welford updates.
+
+    The window covers the last L bars; the return on the segment's first bar
+    is undefined. NaN returns are skipped (min_p counts valid ones only).
+    """
+    n = 0
+    mean = 0.0
+    m2 = 0.0
+    for i in range(lo, hi):
+        # drop the return leaving the window
+        j = i - L
+        if j > lo:
+            y = logp[j] - logp[j - 1]
+            if not np.isnan(y):
+                n -= 1
+                if n == 0:
+                    mean = 0.0
+                    m2 = 0.0
+                else:
+                    d = y - mean
+                    mean -= d / n
+                    m2 -= d * (y - mean)
+        # add the current return
+        if i > lo:
+            x = logp[i] - logp[i - 1]
+            if not np.isnan(x):
+                n += 1
+                d = x - mean
+                mean += d / n
+                m2 += d * (x - mean)
+        if n >= min_p:
+            out[i] = np.sqrt(max(m2 / (n - 1), 0.0))
+        else:
+            out[i] = np.nan
+
+
+@njit(cache=True, nogil=True, parallel=True)
+def _vwap_vol_kernel(close, vol, logp, day, starts, ends, L, min_p, out_vwap, out_sigma):
+    """Both features per symbol segment while its rows are hot in cache."""
+    for k in prange(starts.shape[0]):
+        _vwap_segment(close, vol, day, starts[k], ends[k], out_vwap)
+        _rolling_std_segment(logp, starts[k], ends[k], L, min_p, out_sigma)
+
+
+def zscore_arrays(bars: Bars, lookback_bars: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    VWAP(t-1), rolling sigma and z-score straight from a `Bars` struct.
+
+    Array counterpart of `zscore_vwap_dev` (same definitions).
+    """
+    n = len(bars.close)
+    vwap  = np.empty(n)
+    sigma = np.empty(n)
+    buf = np.log(bars.close, out=_get_scratch(n), dtype=np.float64)
+    off = bars.seg_starts
+    _vwap_vol_kernel(bars.close, bars.volume, buf, bars.day, off[:-1], off[1:],
+                     lookback_bars, max(2, lookback_bars // 2), vwap, sigma)
+    np.subtract(bars.close, vwap, out=buf, dtype=np.float64)  # log prices no longer needed
+    z = safe_div(buf, sigma)
+    np.nan_to_num(z, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+    return vwap, sigma, z
+
+
+def _is_sorted(df: pd.DataFrame) -> bool:
+    sym = as_codes(df)
+    ts = pd.DatetimeIndex(df["datetime"]).as_unit("ns").asi8
+    ds = np.diff(sym)
+    return bool((ds >= 0).all() and (np.diff(ts)[ds == 0] >= 0).all())
 
 
 def zscore_vwap_dev(df: pd.DataFrame, lookback_bars: int) -> pd.DataFrame:
@@ -93,16 +222,15 @@ def zscore_vwap_dev(df: pd.DataFrame, lookback_bars: int) -> pd.DataFrame:
           - 'z'     : (close - vwap) / sigma, finite + 0-filled
     """
 
-    out = df.copy()
-    out.sort_values(["symbol", "datetime"], inplace=True)
-
-    vw = incremental_vwap(out)
-    sg = rolling_vol(out, lookback_bars)
-
-    out["vwap"]  = vw.to_numpy()
-    out["sigma"] = sg.to_numpy()
+    if not ASSUME_SORTED:
+        df = sort_bars(df)
+    elif __debug__:
+        assert _is_sorted(df), "bars must be sorted by ['symbol','datetime'] (see utils.sort_bars)"
+    out = df.copy(deep=False)  # new columns are filled from ndarrays
 
-    z_arr = safe_div(out["close"] - out["vwap"], out["sigma"])
-    out["z"] = pd.Series(z_arr, index=out.index).replace([np.inf, -np.inf], 0.0).fillna(0.0)
+    vwap, sigma, z = zscore_arrays(to_bars(out), lookback_bars)
+    out["vwap"]  = vwap
+    out["sigma"] = sigma
+    out["z"]     = z
     return out
 
@@ -8,40 +8,75 @@ average daily cost (bps), and daily raw/net averages for quick diagnostics.
 from __future__ import annotations
 import pandas as pd
 import numpy as np
+from .utils import local_ns, NS_PER_DAY
 
 TRADING_DAYS = 252
 
-def _infer_bars_per_day(index: pd.DatetimeIndex) -> int:
+def _infer_bars_per_day(index: pd.DatetimeIndex, starts: np.ndarray | None = None) -> int:
 
-    """Infer typical intraday bars/day from the timestamp index (NY time)."""
+    """
+    Infer typical intraday bars/day from the timestamp index (NY time).
+
+    Bars per day are run lengths between NY day boundaries (index assumed
+    sorted). Pass precomputed `starts` from `_day_starts` to skip that pass.
+    """
+
+    if starts is None:
+        starts = _day_starts(index)
+    counts = np.diff(np.append(starts, len(index)))
+    return int(np.median(counts))
+
+def _day_starts(index: pd.DatetimeIndex) -> np.ndarray:
+    """Row offsets where a new NY trading day begins (index assumed sorted)."""
+    day = local_ns(index) // NS_PER_DAY
+    new_day = np.ones(len(day), dtype=bool)
+    new_day[1:] = day[1:] != day[:-1]
+    return np.flatnonzero(new_day)
 
-    idx = index.tz_convert("America/New_York")
-    by_day = pd.Series(1, index=idx).groupby(idx.normalize()).sum()
-    return int(by_day.median())
+def _daily_sum(x: pd.Series, starts: np.ndarray) -> np.ndarray:
+    """Per-day sums of a bar series via reduceat on precomputed day starts."""
+    v = np.nan_to_num(x.to_numpy(dtype=np.float64))
+    return np.add.reduceat(v, starts) if len(starts) else v[:0]
 
-def annualize_sr(ret: pd.Series, bars_per_day: int | None = None) -> float:
+def annualize_sr(ret: pd.Series | np.ndarray, bars_per_day: int | None = None) -> float:
 
     """
     Annualize Sharpe from bar-level returns.
 
-    Uses TRADING_DAYS and inferred bars/day if not provided.
+    Uses TRADING_DAYS and inferred bars/day if not provided (a plain
+    ndarray has no index, so `bars_per_day` is then required).
     """
 
     if bars_per_day is None:
         bars_per_day = _infer_bars_per_day(ret.index)
-    mu = ret.mean()
-    sd = ret.std(ddof=1)
+    r = np.asarray(ret, dtype=np.float64)
+    r = r[~np.isnan(r)]
+    mu = r.mean() if r.size else np.nan
+    sd = r.std(ddof=1) if r.size > 1 else np.nan
     if sd == 0 or np.isnan(sd):
         return 0.0
     daily = mu * bars_per_day
     daily_sd = sd * np.sqrt(bars_per_day)
     return float(np.sqrt(TRADING_DAYS) * daily / daily_sd)
 
+def equity_and_dd(ret: pd.Series | np.ndarray) -> tuple[np.ndarray, float]:
+    """
+    Equity curve and maximum drawdown from bar returns in one pass.
+
+    Equity is compounded in log space (`exp(cumsum(log1p(r)))`); NaN
+    returns are skipped like `cumprod` does and stay NaN in the curve.
+    """
+    r = np.asarray(ret, dtype=np.float64)
+    nan = np.isnan(r)
+    eq = np.exp(np.cumsum(np.log1p(np.where(nan, 0.0, r))))
+    dd = eq / np.maximum.accumulate(eq) - 1.0
+    eq[nan] = np.nan
+    dd = dd[~nan]
+    return eq, float(dd.min()) if dd.size else float("nan")
+
 def max_dd(ret: pd.Series) -> float:
     """Compute maximum drawdown on the cumulative equity curve."""
-    eq = (1 + ret).cumprod()
-    peak = eq.cummax()
-    return float((eq / peak - 1.0).min())
+    return equity_and_dd(ret)[1]
 
 def summary(df_bt: pd.DataFrame) -> dict:
     """
@@ -55,28 +90,31 @@ def summary(df_bt: pd.DataFrame) -> dict:
         Keys include Sharpe (raw/net), CAGR (net), Max DD (net),
         Turnover/day, Avg cost/day (bps), and daily raw/net averages.
     """
-    bpd   = _infer_bars_per_day(df_bt.index)
+    starts = _day_starts(df_bt.index)
+    bpd   = _infer_bars_per_day(df_bt.index, starts)
     r_net = df_bt["net_ret"].astype(float)
     r_raw = df_bt["raw_ret"].astype(float) if "raw_ret" in df_bt else r_net
 
+    eq, mdd = equity_and_dd(r_net)
+    eq_end = eq[~np.isnan(eq)][-1:]
     years = len(r_net) / (TRADING_DAYS * bpd) if len(r_net) else 0.0
-    cagr  = float((1 + r_net).prod() ** (1 / years) - 1) if years > 0 else 0.0
+    cagr  = float(eq_end.prod() ** (1 / years) - 1) if years > 0 else 0.0
 
     turn        = df_bt["turnover"] if "turnover" in df_bt.columns else pd.Series(0.0, index=df_bt.index)
     tc          = df_bt["tc"]       if "tc"       in df_bt.columns else pd.Series(0.0, index=df_bt.index)
-    avg_cost_day = float(tc.groupby(df_bt.index.normalize()).sum().mean())
+    avg_cost_day = float(_daily_sum(tc, starts).mean())
     avg_cost_bps = avg_cost_day * 1e4
-    daily_raw = df_bt["raw_ret"].groupby(df_bt.index.normalize()).sum()
-    daily_net = df_bt["net_ret"].groupby(df_bt.index.normalize()).sum()
+    daily_raw = _daily_sum(df_bt["raw_ret"], starts)
+    daily_net = _daily_sum(df_bt["net_ret"], starts)
 
     return {
         "Ann. Sharpe (raw)": annualize_sr(r_raw, bpd),
         "Ann. Sharpe (net)": annualize_sr(r_net, bpd),
         "CAGR (approx, net)": cagr,
-        "Max DD (net)": max_dd(r_net),
+        "Max DD (net)": mdd,
         "Turnover/day": float(turn.mean() * bpd),
         "Avg cost/day (bps)": avg_cost_bps,
         "Avg raw/day (bps)":  float(daily_raw.mean() * 1e4),
         "Avg net/day (bps)":  float(daily_net.mean() * 1e4),
-        "Daily sd (bps)":     float(daily_net.std(ddof=1) * 1e4),
+        "Daily sd (bps)":     float(daily_net.std(ddof=1) * 1e4) if len(daily_net) > 1 else float("nan"),
     }
@@ -3,6 +3,7 @@ Simple plotting/series helpers for reporting backtest results.
 """
 from __future__ import annotations
 import pandas as pd
+from .metrics import equity_and_dd
 
 
 def equity_curve(df_bt: pd.DataFrame) -> pd.Series:
@@ -19,4 +20,5 @@ def equity_curve(df_bt: pd.DataFrame) -> pd.Series:
     pd.Series
         Equity curve (cumulative product of 1 + net_ret), named "Equity".
     """
-    return (1 + df_bt["net_ret"]).cumprod().rename("Equity")
\ No newline at end of file
+    eq, _ = equity_and_dd(df_bt["net_ret"])
+    return pd.Series(eq, index=df_bt.index, name="Equity")
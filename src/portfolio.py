@@ -8,6 +8,7 @@ All functions operate on *wide* frames (index=time, columns=symbol).
 from __future__ import annotations
 import pandas as pd
 import numpy as np
+from numba import njit, prange
 
 
 def cross_sectional_z(wide: pd.DataFrame) -> pd.DataFrame:
@@ -26,10 +27,58 @@ def cross_sectional_z(wide: pd.DataFrame) -> pd.DataFrame:
         Rows with zero std are filled with 0.0.
     """
 
-    mean = wide.mean(axis=1)
-    std = wide.std(axis=1).replace(0, np.nan)
-    z = (wide.sub(mean, axis=0)).div(std, axis=0).fillna(0.0)
-    return z
+    a = np.ascontiguousarray(wide.to_numpy(dtype=np.float64))
+    z = np.empty_like(a)
+    _zscore_rows_kernel(a, z)
+    return pd.DataFrame(z, index=wide.index, columns=wide.columns)
+
+
+# Row kernels: each row (timestamp) is independent, so rows run in parallel
+# and every statistic is taken while the row is still in cache.
+
+@njit(cache=True, parallel=True)
+def _zscore_rows_kernel(a, out):
+    """(x - mean) / std (ddof=1) per row over non-NaN entries; NaN / degenerate -> 0."""
+    T, N = a.shape
+    for t in prange(T):
+        n = 0
+        s = 0.0
+        for j in range(N):
+            if not np.isnan(a[t, j]):
+                n += 1
+                s += a[t, j]
+        mu = 0.0
+        ss = 0.0
+        if n > 1:
+            mu = s / n
+            for j in range(N):
+                if not np.isnan(a[t, j]):
+                    d = a[t, j] - mu
+                    ss += d * d
+        if ss == 0.0:
+            for j in range(N):
+                out[t, j] = 0.0
+            continue
+        sd = np.sqrt(ss / (n - 1))
+        for j in range(N):
+            x = a[t, j]
+            out[t, j] = (x - mu) / sd if not np.isnan(x) else 0.0
+
+
+@njit(cache=True, parallel=True)
+def _demean_rows_kernel(a, out):
+    """x - mean over the row's non-NaN entries (NaN stays NaN)."""
+    T, N = a.shape
+    for t in prange(T):
+        n = 0
+        s = 0.0
+        for j in range(N):
+            if not np.isnan(a[t, j]):
+                n += 1
+                s += a[t, j]
+        mu = s / n if n > 0 else np.nan
+        for j in range(N):
+            out[t, j] = a[t, j] - mu
 
 
 def neutralize(wide: pd.DataFrame, sectors: pd.Series | None = None) -> pd.DataFrame:
@@ -55,14 +104,31 @@ def neutralize(wide: pd.DataFrame, sectors: pd.Series | None = None) -> pd.DataF
     """
     
     if sectors is None:
-        return wide.sub(wide.mean(axis=1), axis=0)
-    out = []
-    for sec, cols in sectors.groupby(sectors).groups.items():
-        sub = wide[cols]
-        out.append(sub.sub(sub.mean(axis=1), axis=0))
-    out = pd.concat(out, axis=1).reindex(columns=wide.columns)
+        x = np.array(wide.to_numpy(dtype=np.float64), order="C")  # own copy, demeaned in place
+        _demean_rows_kernel(x, x)
+        return pd.DataFrame(x, index=wide.index, columns=wide.columns)
+
+    # group columns by sector code, then per-row sector means via reduceat
+    codes, _ = pd.factorize(sectors.reindex(wide.columns))
+    order = np.argsort(codes, kind="stable")
+    cs = codes[order]
+    x = wide.to_numpy(dtype=np.float64)[:, order]
+    dm = np.full_like(x, np.nan)
+    if len(cs):
+        starts = np.flatnonzero(np.r_[True, cs[1:] != cs[:-1]])
+        ok = ~np.isnan(x)
+        sums = np.add.reduceat(np.where(ok, x, 0.0), starts, axis=1)
+        cnts = np.add.reduceat(ok, starts, axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            means = sums / cnts
+        dm = x - np.repeat(means, np.diff(np.r_[starts, len(cs)]), axis=1)
+        dm[:, cs < 0] = np.nan  # symbols without a sector
+    out = np.empty_like(dm)
+    out[:, order] = dm
+
     # finally de‑mean market
-    return out.sub(out.mean(axis=1), axis=0)
+    _demean_rows_kernel(out, out)
+    return pd.DataFrame(out, index=wide.index, columns=wide.columns)
 
 
 def size_positions(raw: pd.DataFrame, gross: float = 2.0, max_w: float = 0.004) -> pd.DataFrame:
@@ -89,9 +155,38 @@ def size_positions(raw: pd.DataFrame, gross: float = 2.0, max_w: float = 0.004)
     DataFrame
         Sized and capped positions with the same shape as `raw`.
     """
-    scaled = raw.div(raw.abs().sum(axis=1), axis=0) * gross
-    capped = scaled.clip(-max_w, max_w).fillna(0.0)
-    # re‑scale to hit gross approximately
-    gross_now = capped.abs().sum(axis=1)
-    adj = (gross / gross_now).replace([np.inf, -np.inf], 0.0).fillna(0.0)
-    return capped.mul(adj, axis=0).fillna(0.0)
\ No newline at end of file
+    a = np.ascontiguousarray(raw.to_numpy(dtype=np.float64))
+    out = np.empty_like(a)
+    _size_kernel(a, float(gross), float(max_w), out)
+    return pd.DataFrame(out, index=raw.index, columns=raw.columns)
+
+
+@njit(cache=True, parallel=True)
+def _size_kernel(raw, gross, max_w, out):
+    """Row-parallel scale -> clip -> rescale; NaNs count as flat."""
+    T, N = raw.shape
+    for t in prange(T):
+        g1 = 0.0
+        for j in range(N):
+            if not np.isnan(raw[t, j]):
+                g1 += abs(raw[t, j])
+        if g1 == 0.0:
+            for j in range(N):
+                out[t, j] = 0.0
+            continue
+        s = gross / g1
+        g2 = 0.0
+        for j in range(N):
+            v = raw[t, j] * s
+            if np.isnan(v):
+                v = 0.0
+            elif v > max_w:
+                v = max_w
+            elif v < -max_w:
+                v = -max_w
+            out[t, j] = v
+            g2 += abs(v)
+        # re‑scale to hit gross approximately
+        adj = gross / g2 if g2 > 0.0 else 0.0
+        for j in range(N):
+            out[t, j] *= adj
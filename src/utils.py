@@ -2,6 +2,7 @@
 Utility functions for intraday backtesting.
 
 Includes:
+- Integer symbol codes shared by the numba kernels, and a sort on them.
 - Session filtering (restrict bars to market open/close).
 - Winsorization (clip extremes at quantiles).
 - Safe division (avoid divide-by-zero errors).
@@ -14,6 +15,46 @@ import numpy as np
 
 TZ = "America/New_York"
 
+NS_PER_MIN = 60_000_000_000
+NS_PER_DAY = 86_400_000_000_000
+
+
+def local_ns(index: pd.DatetimeIndex, tz: str = TZ) -> np.ndarray:
+    """
+    Wall-clock nanoseconds in `tz` for a tz-aware DatetimeIndex.
+
+    `local_ns(idx) % NS_PER_DAY` is the time of day and `// NS_PER_DAY`
+    a day number, both as plain int64 arrays (DST-aware).
+    """
+    return index.tz_convert(tz).tz_localize(None).as_unit("ns").asi8
+
+
+def as_codes(df: pd.DataFrame, col: str = "symbol") -> np.ndarray:
+    """
+    Integer group codes for `df[col]` (int32, -1 for missing).
+
+    Categorical columns reuse their stored codes; anything else is
+    factorized in sorted order, so codes follow the labels either way.
+    """
+    s = df[col]
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes = s.cat.codes.to_numpy()
+    else:
+        codes, _ = pd.factorize(s, sort=True)
+    return codes.astype(np.int32, copy=False)
+
+
+def sort_bars(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sort long-form bars by ['symbol', 'datetime'].
+
+    Same order as `df.sort_values(["symbol", "datetime"])` (stable), but
+    lexsorts the integer symbol codes and int64 timestamps instead of
+    comparing strings.
+    """
+    ts = pd.DatetimeIndex(df["datetime"]).as_unit("ns").asi8
+    return df.take(np.lexsort((ts, as_codes(df))))
+
 
 def sessionize(df: pd.DataFrame, open_t: str = "09:30", close_t: str = "16:00") -> pd.DataFrame:
     """
@@ -31,17 +72,26 @@ def sessionize(df: pd.DataFrame, open_t: str = "09:30", close_t: str = "16:00")
     Returns
     -------
     pd.DataFrame
-        Filtered DataFrame containing only bars within the session window.
+        Filtered DataFrame containing only bars within the session window,
+        plus 'dt' (datetime in TZ) and 'date' (int32 session day number,
+        days since 1970-01-01 in TZ).
     """
 
-    idx = pd.to_datetime(df["datetime"]).dt.tz_convert(TZ)
-    df = df.copy()
-    df["dt"] = idx
-    df["date"] = df["dt"].dt.date
-    df = df[(df["dt"].dt.time >= pd.to_datetime(open_t).time()) & (df["dt"].dt.time <= pd.to_datetime(close_t).time())]
+    idx = pd.DatetimeIndex(pd.to_datetime(df["datetime"]))
+    ns = local_ns(idx)
+    tod = ns % NS_PER_DAY
+    mask = (tod >= _time_ns(open_t)) & (tod <= _time_ns(close_t))
+    df = df[mask].copy()
+    df["dt"] = idx[mask].tz_convert(TZ)
+    df["date"] = (ns[mask] // NS_PER_DAY).astype(np.int32)
     return df
 
 
+def _time_ns(t: str) -> int:
+    """'HH:MM[:SS]' -> nanoseconds since midnight."""
+    return pd.Timedelta(pd.to_datetime(t).strftime("%H:%M:%S")).value
+
+
 def winsorize(s: pd.Series, p: float = 0.01) -> pd.Series:
     """
     Clip extreme values at lower/upper quantiles.
@@ -59,8 +109,16 @@ def winsorize(s: pd.Series, p: float = 0.01) -> pd.Series:
         Winsorized series.
     """
 
-    lo, hi = s.quantile(p), s.quantile(1 - p)
-    return s.clip(lo, hi)
+    a = s.to_numpy(dtype=np.float64)
+    valid = a[~np.isnan(a)]
+    if valid.size == 0:
+        return s.astype(np.float64)
+    # linear-interpolated quantiles (as Series.quantile) from one introselect pass
+    pos = np.array([p, 1 - p]) * (valid.size - 1)
+    f, c = np.floor(pos).astype(np.int64), np.ceil(pos).astype(np.int64)
+    part = np.partition(valid, np.unique(np.r_[f, c]))
+    lo, hi = part[f] + (part[c] - part[f]) * (pos - f)
+    return pd.Series(np.clip(a, lo, hi), index=s.index, name=s.name)
 
 
 def safe_div(a, b):
@@ -79,6 +137,8 @@ def safe_div(a, b):
     np.ndarray
         Result of a / b, with zeros where b == 0.
     """
-    with np.errstate(divide='ignore', invalid='ignore'):
-        out = np.where(b != 0, a / b, 0.0)
-    return out
\ No newline at end of file
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    out = np.zeros(np.broadcast_shapes(a.shape, b.shape))
+    np.divide(a, b, out=out, where=(b != 0))
+    return out
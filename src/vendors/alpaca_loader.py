@@ -1,6 +1,11 @@
 from __future__ import annotations
+import hashlib
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from pathlib import Path
 from typing import Sequence
 import pandas as pd
 from alpaca.data.historical import StockHistoricalDataClient
@@ -10,15 +15,86 @@ from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
 
 NY = "America/New_York"
 
+CHUNK = 200          # symbols per request
+MAX_WORKERS = 8      # concurrent requests in flight
+MIN_INTERVAL = 0.3   # seconds between request starts (Alpaca allows 200/min)
 
+# On-disk cache of fetched bars, one Parquet file per distinct request.
+CACHE_DIR = Path(os.getenv("INTRADAY_BARS_CACHE", "~/.cache/intraday_bars")).expanduser()
 
 
-def _get_client():
+
+
+_local = threading.local()
+_rate_lock = threading.Lock()
+_last_start = [0.0]
+
+
+def get_keys() -> tuple[str, str]:
     key = os.getenv("APCA_API_KEY_ID") or os.getenv("ALPACA_API_KEY")
     sec = os.getenv("APCA_API_SECRET_KEY") or os.getenv("ALPACA_SECRET_KEY")
     if not key or not sec:
         raise RuntimeError("Set APCA_API_KEY_ID and APCA_API_SECRET_KEY env vars.")
-    return StockHistoricalDataClient(key, sec)
+    return key, sec
+
+
+def _get_client():
+    """One StockHistoricalDataClient per thread, reused across calls."""
+    if not hasattr(_local, "dc"):
+        _local.dc = StockHistoricalDataClient(*get_keys())
+    return _local.dc
+
+
+def _throttle():
+    """Space request starts MIN_INTERVAL apart across all worker threads."""
+    with _rate_lock:
+        wait = _last_start[0] + MIN_INTERVAL - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        _last_start[0] = time.monotonic()
+
+
+def _to_utc(ts: str | datetime) -> pd.Timestamp:
+    """Timestamp in UTC; naive inputs are read as New York time."""
+    ts = pd.Timestamp(ts)
+    return ts.tz_convert("UTC") if ts.tzinfo else ts.tz_localize(NY).tz_convert("UTC")
+
+
+def fetch_bars_chunked(
+    symbols: Sequence[str],
+    start: str | datetime,
+    end: str | datetime,
+    timeframe: TimeFrame,
+    feed: str = "iex",
+    adjustment: str = "split",
+) -> list[pd.DataFrame]:
+    """
+    Fetch bars for `symbols` in CHUNK-sized requests, MAX_WORKERS at a time.
+
+    Request starts are throttled to Alpaca's rate limit and each worker
+    thread keeps its own client. Returns the non-empty `.df` frames
+    (MultiIndex symbol, timestamp) in chunk order.
+    """
+    start_utc = _to_utc(start).to_pydatetime()
+    end_utc = _to_utc(end).to_pydatetime()
+
+    def one(chunk):
+        req = StockBarsRequest(
+            symbol_or_symbols=chunk,
+            timeframe=timeframe,
+            start=start_utc,
+            end=end_utc,
+            feed=feed,
+            adjustment=adjustment,
+        )
+        _throttle()  # be nice to the API
+        return _get_client().get_stock_bars(req).df
+
+    symbols = list(symbols)
+    chunks = [symbols[i:i+CHUNK] for i in range(0, len(symbols), CHUNK)]
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(chunks)))) as ex:
+        frames = list(ex.map(one, chunks))
+    return [f for f in frames if f is not None and not f.empty]
 
 
 
@@ -31,40 +107,55 @@ def fetch_alpaca_minute_bars(
     feed: str = "iex", # or "sip" if you are subscribed
     adjustment: str = "split", # split‑adjusted prices
     regular_hours_only: bool = True,
+    use_cache: bool = True,
 ) -> pd.DataFrame:
-    """Return bars with columns: symbol, datetime (UTC), open, high, low, close, volume."""
-    client = _get_client()
+    """
+    Return bars with columns: symbol, datetime (UTC), open, high, low, close, volume.
+
+    With `use_cache`, results are memoized as zstd Parquet under CACHE_DIR
+    (override with $INTRADAY_BARS_CACHE), keyed on the symbol set, UTC range
+    and request options. Requests whose `end` is not yet in the past may
+    still be missing bars, so they bypass the cache entirely. Entries never
+    expire; delete the file to refetch.
+    """
+    # Alpaca expects UTC timestamps; accept strings or datetimes in any tz.
+    start_ts = _to_utc(start)
+    end_ts = _to_utc(end)
+
+    symbols = list(symbols)
+    path = None
+    if use_cache and end_ts < pd.Timestamp.now(tz="UTC"):
+        key = repr((sorted(set(symbols)), start_ts.isoformat(), end_ts.isoformat(),
+                    timeframe_minutes, feed, adjustment, regular_hours_only))
+        path = CACHE_DIR / f"{hashlib.sha1(key.encode()).hexdigest()}.parquet"
+        if path.exists():
+            return pd.read_parquet(path, engine="pyarrow")
+
+    df = _fetch(symbols, start_ts, end_ts, timeframe_minutes, feed, adjustment, regular_hours_only)
+    if path is not None and not df.empty:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        df.to_parquet(tmp, engine="pyarrow", compression="zstd", index=False)
+        os.replace(tmp, path)  # atomic: readers never see a partial file
+    return df
 
 
-    # Alpaca expects UTC timestamps; accept strings or datetimes in any tz.
-    start_ts = pd.Timestamp(start).tz_convert("UTC") if pd.Timestamp(start).tzinfo else pd.Timestamp(start, tz=NY).tz_convert("UTC")
-    end_ts = pd.Timestamp(end).tz_convert("UTC") if pd.Timestamp(end).tzinfo else pd.Timestamp(end, tz=NY).tz_convert("UTC")
 
 
+def _fetch(symbols, start_ts, end_ts, timeframe_minutes, feed, adjustment, regular_hours_only) -> pd.DataFrame:
     tf = TimeFrame(timeframe_minutes, TimeFrameUnit.Minute)
-    req = StockBarsRequest(
-        symbol_or_symbols=list(symbols),
-        timeframe=tf,
-        start=start_ts.to_pydatetime(),
-        end=end_ts.to_pydatetime(),
-        feed=feed,
-        adjustment=adjustment,
-    )
-    bars = client.get_stock_bars(req)
-    df = bars.df # MultiIndex (symbol, timestamp)
-    if df is None or df.empty:
+    frames = fetch_bars_chunked(symbols, start_ts, end_ts, tf, feed, adjustment)
+    if not frames:
         return pd.DataFrame(columns=["symbol","datetime","open","high","low","close","volume"]) # empty
+    df = frames[0] if len(frames) == 1 else pd.concat(frames)
 
 
     df = df.reset_index().rename(columns={"timestamp": "datetime"})
 
 
     # Keep only core columns and sort
-    df = df[["symbol","datetime","open","high","low","close","volume"]].copy()
-
-
-    # Ensure tz‑aware UTC
-    df["datetime"] = pd.to_datetime(df["datetime"], utc=True)
+    # (Alpaca's timestamp level is already tz-aware UTC.)
+    df = df[["symbol","datetime","open","high","low","close","volume"]]
 
 
     if regular_hours_only:
@@ -74,5 +165,6 @@ def fetch_alpaca_minute_bars(
         df = df[mask]
 
 
-    df.sort_values(["symbol","datetime"], inplace=True)
+    df = df.sort_values(["symbol","datetime"], ignore_index=True)
+    df["symbol"] = df["symbol"].astype("category")
     return df
\ No newline at end of file
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+from src.backtest import (apply_no_trade_band, band_rate_limit, rate_limit_time,
+                          signal_ranks, sticky_membership, to_wide)
+
+
+def test_rate_limit_steps_toward_target():
+    # Each bar moves at most 10 bps toward target, never beyond the 20 bps cap
+    idx = pd.date_range("2024-01-02 10:30", periods=4, freq="5min", tz="America/New_York")
+    w = pd.DataFrame({"AAA": [0.003] * 4, "BBB": [-0.01] * 4}, index=idx)
+    out = rate_limit_time(w, step_bps=10, max_w=0.002)
+    assert np.allclose(out["AAA"], [0.001, 0.002, 0.002, 0.002])
+    assert np.allclose(out["BBB"], [-0.001, -0.002, -0.002, -0.002])
+
+
+def test_signal_ranks_match_pandas_first():
+    # ties broken by column order, NaNs excluded from the pct denominator
+    idx = pd.date_range("2024-01-02 10:30", periods=3, freq="5min", tz="America/New_York")
+    px = pd.DataFrame({"A": [10.0, 11.0, 12.0], "B": [10.0, 11.0, np.nan],
+                       "C": [10.0, 9.0, 12.0], "D": [10.0, 11.0, 11.0]}, index=idx)
+    expected = (-np.log(px).diff(1)).rank(axis=1, method="first", pct=True)
+    pd.testing.assert_frame_equal(signal_ranks(px, K=1), expected)
+
+
+def test_sticky_membership_holds_exits_between_updates():
+    # hysteresis on update bars; the state (including an exit to flat) is held in between
+    idx = pd.date_range("2024-01-02 10:30", periods=5, freq="5min", tz="America/New_York")
+    ranks = pd.DataFrame({"A": [0.2, 0.9, 0.30, 0.9, 0.1],
+                          "B": [0.9, 0.1, 0.50, 0.9, 0.9],
+                          "C": [0.5, 0.1, 0.80, 0.1, 0.5]}, index=idx)
+    upd = pd.Series([True, False, True, False, False], index=idx)
+    m = sticky_membership(None, q_in=0.25, q_out=0.35, update_mask=upd, ranks=ranks)
+    assert m["A"].tolist() == [-1, -1, -1, -1, -1]  # stays short inside q_out
+    assert m["B"].tolist() == [1, 1, 0, 0, 0]       # exits to flat, not refilled to +1
+    assert m["C"].tolist() == [0, 0, 1, 1, 1]
+
+    # a rank inside both entry zones goes short
+    tie = sticky_membership(None, q_in=0.5, q_out=0.5, ranks=ranks.iloc[:1].assign(A=0.5))
+    assert tie["A"].iloc[0] == -1
+
+
+def test_band_rate_limit_matches_two_stage():
+    # fused kernel == band then rate limit; band_bps=0 leaves only the rate limit
+    rng = np.random.default_rng(0)
+    idx = pd.date_range("2024-01-02 10:30", periods=50, freq="5min", tz="America/New_York")
+    w = pd.DataFrame(rng.normal(0, 0.003, (50, 4)), index=idx, columns=list("ABCD"))
+    for band in (0.0, 5.0, 20.0):
+        expected = rate_limit_time(apply_no_trade_band(w, band), step_bps=10, max_w=0.004)
+        pd.testing.assert_frame_equal(band_rate_limit(w, band, 10, 0.004), expected)
+
+
+def test_to_wide_drops_missing_keys():
+    # rows with a NaN symbol or NaT datetime have no cell in the grid
+    df = pd.DataFrame({
+        "datetime": pd.to_datetime(["2024-01-02 15:00", "2024-01-02 15:00", None, "2024-01-02 15:05"], utc=True),
+        "symbol": ["A", None, "B", "B"],
+        "close": [1.0, 2.0, 3.0, 4.0],
+    })
+    w = to_wide(df, "close")
+    assert list(w.columns) == ["A", "B"] and len(w) == 2
+    assert np.allclose(w.to_numpy(), [[1.0, np.nan], [np.nan, 4.0]], equal_nan=True)
@@ -0,0 +1,15 @@
+import numpy as np
+import pandas as pd
+from src.data import median_dollar_vol
+
+
+def test_median_dollar_vol_drops_missing_symbols():
+    # NaN symbols form no group and never borrow another symbol's label
+    df = pd.DataFrame({
+        "symbol": ["A", None, "B"],
+        "datetime": pd.to_datetime(["2024-01-02 15:00"] * 3, utc=True),
+        "close": [1.0, 2.0, 3.0],
+        "volume": [1.0, 1.0, 1.0],
+    })
+    med = median_dollar_vol(df)
+    assert list(med.items()) == [("A", 1.0), ("B", 3.0)]
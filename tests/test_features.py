@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from src.features import incremental_vwap, rolling_vol
 
@@ -14,4 +15,32 @@ def test_vwap_monotone():
     })
     v = incremental_vwap(df)
     assert v.is_monotonic_increasing is False # flat prices → flat VWAP
-    assert v.notna().all()
\ No newline at end of file
+    assert v.notna().all()
+
+def test_rolling_vol_resets_per_symbol():
+    # Matches a per-symbol pandas rolling std; no window spans two symbols
+    close = [10, 10.1, 10.05, 10.2, 10.15, 20, 19.8, 20.1, 20.3, 20.2]
+    df = pd.DataFrame({
+        "symbol": ["AAA"]*5 + ["BBB"]*5,
+        "datetime": list(pd.date_range("2024-01-01 09:30", periods=5, freq="5min", tz="America/New_York"))*2,
+        "close": close,
+    })
+    ret = np.log(df["close"]).groupby(df["symbol"]).diff()
+    expected = ret.groupby(df["symbol"]).transform(lambda s: s.rolling(3, min_periods=2).std())
+    got = rolling_vol(df, lookback_bars=3)
+    assert np.allclose(got, expected, equal_nan=True)
+    assert got.isna().tolist() == [True, True, False, False, False]*2
+
+def test_vwap_resets_per_symbol_day():
+    # First bar of every (symbol, day) is its own close; no carry-over across groups
+    days = [pd.Timestamp("2024-01-02 09:30", tz="America/New_York"),
+            pd.Timestamp("2024-01-03 09:30", tz="America/New_York")]
+    dt = [d + pd.Timedelta(minutes=5 * i) for d in days for i in range(2)]
+    df = pd.DataFrame({
+        "symbol": ["AAA"]*4 + ["BBB"]*4,
+        "datetime": dt * 2,
+        "close": [10, 11, 20, 21, 50, 51, 60, 61],
+        "volume": [100, 100, 100, 100, 100, 100, 100, 100],
+    })
+    v = incremental_vwap(df)
+    assert v.tolist() == [10, 10, 20, 20, 50, 50, 60, 60]
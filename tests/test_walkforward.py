@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+from scripts.walkforward import day_ids, slice_days
+
+
+def test_slice_days_handles_symbol_sorted_bars():
+    # ['symbol','datetime'] order must select the same rows as datetime order
+    dt = pd.date_range("2024-01-02 15:00", periods=4, freq="1D", tz="UTC")
+    df = pd.DataFrame({"symbol": ["AAA"]*4 + ["BBB"]*4,
+                       "datetime": list(dt) * 2,
+                       "close": np.arange(8.0)})
+    d0, d1 = dt[1].tz_convert("America/New_York"), dt[2].tz_convert("America/New_York")
+    for bars in (df, df.sort_values(["datetime", "symbol"])):
+        sl, days = slice_days(bars, d0, d1, day_ids(bars["datetime"]))
+        assert sorted(sl["close"]) == [1.0, 2.0, 5.0, 6.0]
+        assert len(days) == 4